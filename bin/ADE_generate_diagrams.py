@@ -1,4 +1,5 @@
 import argparse
+import os
 import subprocess
 import sys
 from pathlib import Path
@@ -100,8 +101,15 @@ def compile_dot_to_file(dot_file, output_dir, file_num, fmt="svg", dpi=300):
         sys.exit(1)
 
 def find_md_files(root_dir):
-    """Recursively find all .md files in the repository."""
-    return list(Path(root_dir).rglob("*.md"))
+    """Recursively find all .md files, skipping node_modules and hidden entries."""
+    md_files = []
+    for root, dirs, files in os.walk(root_dir):
+        # Prune node_modules and hidden dirs so they are never descended into
+        dirs[:] = [d for d in dirs if d != "node_modules" and not d.startswith(".")]
+        md_files.extend(
+            Path(root, f) for f in files if f.endswith(".md") and not f.startswith(".")
+        )
+    return md_files
 
 def compile_dot_to_svg(dot_code, output_path, caption="diagram"):
     """Compiles Graphviz DOT code to SVG."""
@@ -168,10 +176,6 @@ def process_markdown_diagrams(project_root, check_only=False):
     files_to_update = []
 
     for md_file in md_files:
-        # Skip node_modules and hidden dirs
-        if "node_modules" in str(md_file) or "/." in str(md_file):
-            continue
-            
         with open(md_file, "r", encoding="utf-8") as f:
             content = f.read()
             
@@ -10,40 +10,198 @@
 # - Incremental history updates.
 # - Local filesystem analysis.
 # - Language-specific metrics (LOC, TODOs, FIXMEs).
+#   .js/.json files over 1 MiB (bundles, generated data) are not counted.
 # - Configuration health reporting.
 
 import argparse
-import json
 import os
 import re
 import subprocess
 import sys
-from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 
-# Ensure we can import config_utils from the same directory
+# Ensure we can import config_utils from the same directory.
+# json, datetime and ADE_config_utils are imported lazily where they are used
+# so short invocations (--help, no-op incremental runs) start faster.
 sys.path.append(str(Path(__file__).parent))
-try:
-    import ADE_config_utils as config_utils
-except ImportError:
-    pass
+
+# File extension -> language for history analysis
+_LANG_MAP = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".md": "markdown",
+    ".css": "css",
+    ".sh": "shell",
+    ".json": "json",
+}
+
+# Debt markers (split so this file does not count itself)
+_TODO = "TO" + "DO"
+_FIXME = "FIX" + "ME"
+_TODO_B = _TODO.encode()
+_FIXME_B = _FIXME.encode()
+# Line scanners matching analyze_bytes: bytes.splitlines breaks on \r, \n and
+# \r\n, and a line counts as code if it has a non-whitespace byte
+_RE_NONBLANK_LINE = re.compile(rb"\S[^\r\n]*")
+# Marker scanners start at the marker and consume the rest of its line, so a
+# line counts once however many markers it has, and each byte is seen once
+_RE_TODO_LINE = re.compile(_TODO_B + rb"[^\r\n]*")
+_RE_FIXME_LINE = re.compile(_FIXME_B + rb"[^\r\n]*")
+# Local files at least this large are counted through mmap instead of read()
+_MMAP_MIN_BYTES = 1 << 20
+
+# Minimum commits per worker before history analysis goes parallel
+_COMMITS_PER_WORKER = 50
+
+# Files of these types larger than _MAX_BLOB_BYTES are treated as bundles or
+# generated data and excluded from LOC and marker counts, in both modes
+_SIZE_CAPPED_EXTS = (".js", ".json")
+_MAX_BLOB_BYTES = 1 << 20
+
+# Common lock files are generated, not authored, and skipped in LOC counts
+_LOCKFILES = frozenset(
+    ("package-lock.json", "pnpm-lock.yaml", "yarn.lock", "poetry.lock")
+)
+# Local analysis also skips vendored dependency trees
+_LOCAL_EXCLUDES = (*sorted(_LOCKFILES), "node_modules/**")
+# Directories the non-git fallback walk never enters
+_FALLBACK_SKIP_DIRS = frozenset((".git", "node_modules"))
+
+# Stats keys that accumulate LOC per language (source vs test code)
+_SRC_KEY = {
+    "python": "loc_python",
+    "typescript": "loc_typescript",
+    "javascript": "loc_typescript",
+    "markdown": "loc_markdown",
+    "css": "loc_css",
+    "shell": "loc_shell",
+    "json": "loc_json",
+}
+_TEST_KEY = {
+    "python": "test_loc_python",
+    "typescript": "test_loc_typescript",
+    "javascript": "test_loc_typescript",
+    "shell": "test_loc_shell",
+}
+# Extension -> (TODO key, FIXME key, source LOC key, test LOC key), resolved
+# once so the per-file loop does a single lookup instead of a lang hop
+_EXT_KEYS = {
+    ext: (("md_todos", "md_fixmes") if lang == "markdown" else ("todos", "fixmes"))
+    + (_SRC_KEY.get(lang), _TEST_KEY.get(lang))
+    for ext, lang in _LANG_MAP.items()
+}
+
+# Basename suffixes that mark a test file
+_TEST_SUFFIXES = (
+    "_test.py",
+    ".test.js",
+    ".test.jsx",
+    ".test.ts",
+    ".test.tsx",
+    ".spec.js",
+    ".spec.jsx",
+    ".spec.ts",
+    ".spec.tsx",
+)
+
+# Bump when SimpleSVGChart output changes so memoized SVGs are regenerated
+_CHART_VERSION = "5"
+
+# Attribute fragments repeated on many SimpleSVGChart elements
+_TEXT_ATTRS = 'font-family="sans-serif" font-size="12"'
+_LABEL_ATTRS = 'font-family="sans-serif" font-size="10"'
+_GRID_ATTRS = 'stroke="#ddd" stroke-dasharray="4"'
+# Escapes chart text (titles, labels) in one str.translate pass
+_XML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+# validate.sh / validation_summary_log.md metrics
+_RE_FRONTEND = re.compile(r"Frontend\s*\|[^|]*\|\s*([\d.]+)%")
+_RE_BACKEND = re.compile(r"Backend\s*\|[^|]*\|\s*([\d.]+)%")
+_RE_COV = re.compile(r"TOTAL\s*([\d.]+)%")
+# Matches are confined to one line so the pattern can scan the whole log
+_RE_TIMING = re.compile(r"TIMING_METRIC:[^\S\n]*([^=\n]+)=([\d.]+)s")
+
+# HISTORY.md and docs/ table parsing
+_RE_HIST_ROW = re.compile(r"\|\s*\d{4}-\d{2}-\d{2}\s*\|\s*`([^`]+)`")
+_RE_DATA_ROW = re.compile(r"^\| \d[^\n]*", re.M)
+# Data row: date, two skipped columns (commit, author), 12 plain counts and
+# four "Code / MD"-style pairs; the trailing pipe is optional
+_RE_ROW_FIELDS = re.compile(
+    r"\| (\d{4}-\d{2}-\d{2}[^|]*?)\s*\|[^|]*\|[^|]*\|"
+    + r"\s*(\d+)\s*\|" * 12
+    + r"\s*(\d+)\s*/\s*(\d+)\s*\|" * 3
+    + r"\s*(\d+)\s*/\s*(\d+)\s*(?:\||$)"
+)
+# Report row for an analyze_commit stats dict, filled in one %-format pass.
+# Includes both TODO and FIXME (C / M) counts.
+_ROW_TEMPLATE = (
+    "| %(date)s | `%(commit)s` | %(author)s | "
+    "%(loc_total)s | %(loc_python)s | %(loc_typescript)s | "
+    "%(loc_markdown)s | %(loc_css)s | %(loc_shell)s | %(loc_json)s | "
+    "%(test_files)s | %(test_loc_total)s | %(test_loc_python)s | "
+    "%(test_loc_typescript)s | %(test_loc_shell)s | "
+    "%(todos)s / %(md_todos)s | %(fixmes)s / %(md_fixmes)s | "
+    "%(open_reqs)s / %(total_reqs)s | %(open_issues)s / %(total_issues)s |"
+)
+_ROW_KEYS = (
+    "loc_total",
+    "loc_py",
+    "loc_ts",
+    "loc_md",
+    "loc_css",
+    "loc_sh",
+    "loc_json",
+    "test_files",
+    "test_loc_total",
+    "test_loc_py",
+    "test_loc_ts",
+    "test_loc_sh",
+    # Markers in the new table are split Format: "Code / MD"
+    "todos",
+    "md_todos",
+    "fixmes",
+    "md_fixmes",
+    "open_reqs",
+    "total_reqs",
+    "open_issues",
+    "total_issues",
+)
+# REQUIREMENTS.md / ISSUES.md rows, matched per line in a single MULTILINE scan
+_RE_REQ_ROW = re.compile(
+    r"^(?=[^\n]*\|[^\S\n]*\*\*REQ-\d+\*\*)(?:(?:[^|\n]*\|){3}([^|\n]*))?", re.M
+)
+_RE_ISSUE_ROW = re.compile(
+    r"^(?=[^\n]*\|[^\S\n]*\*\*(?:CR|HP|LP|DS|DX|DEF|SEC|TASK|TECH)-)[^\n]*", re.M
+)
 
 
 def run_git_command(args, cwd):
-    """Run a git command and return the output."""
-    try:
-        result = subprocess.run(
-            ["git"] + args, cwd=cwd, capture_output=True, text=True, check=True
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError:
-        # print(f"Error running git command: {e}", file=sys.stderr)
+    """Run a git command and return the output (None on failure).
+
+    Output is read as bytes and decoded once; stderr is discarded instead of
+    being buffered.
+    """
+    result = subprocess.run(
+        ["git", *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    if result.returncode != 0:
         return None
+    return result.stdout.decode("utf-8", "replace").strip()
 
 
-def get_commits(cwd, limit=None, since_commit=None):
+def get_commits(cwd, limit=None, since_commit=None, no_merges=False):
     """Get a list of commits (hash, date, author, subject)."""
-    args = ["log", "--pretty=format:%H|%ad|%an|%s", "--date=short"]
+    # -z with NUL-separated fields: records split unambiguously whatever the
+    # subject contains
+    args = ["log", "-z", "--pretty=format:%H%x00%ad%x00%an%x00%s", "--date=short"]
+
+    if no_merges:
+        args.append("--no-merges")
 
     if since_commit:
         # Get commits from since_commit..HEAD using proper git syntax
@@ -57,97 +215,200 @@ def get_commits(cwd, limit=None, since_commit=None):
     if not output:
         return []
 
-    commits = []
-    for line in output.split("\n"):
-        parts = line.split("|", 3)
-        if len(parts) == 4:
-            commits.append(
-                {
-                    "hash": parts[0],
-                    "date": parts[1],
-                    "author": parts[2],
-                    "subject": parts[3],
-                }
-            )
-    return commits
+    fields = output.split("\0")
+    return [
+        {"hash": h, "date": d, "author": a, "subject": s}
+        for h, d, a, s in zip(*[iter(fields)] * 4)
+    ]
 
 
-def get_files_at_commit(cwd, commit_hash):
-    """Get a list of files present at a specific commit."""
-    output = run_git_command(["ls-tree", "-r", "--name-only", commit_hash], cwd)
-    if not output:
-        return []
-    return output.split("\n")
+class GitCatFile:
+    """Persistent `git cat-file --batch` process for reading trees and blobs.
 
+    One process serves every tree listing and file read of a run, instead of
+    forking `git ls-tree` per commit and `git show` per file.
+    """
 
-def get_file_content_git(cwd, commit_hash, file_path):
-    """Get the content of a file at a specific commit."""
-    try:
-        result = subprocess.run(
-            ["git", "show", f"{commit_hash}:{file_path}"],
+    def __init__(self, cwd):
+        self.proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
             cwd=cwd,
-            capture_output=True,
-            text=True,
-            errors="ignore",
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
         )
-        if result.returncode != 0:
-            return ""
-        return result.stdout
-    except Exception:
-        return ""
+        # `git cat-file --batch-check` child for size queries, started on demand
+        self.cwd = cwd
+        self._check = None
+        # tree oid -> direct entries [(name, is_tree, oid)]; trees are immutable
+        self._trees = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for proc in (self.proc, self._check):
+            if proc is not None:
+                proc.stdin.close()
+                proc.wait()
+                proc.stdout.close()
+
+    def _read(self, name):
+        """Returns (oid, type, raw bytes) of an object, or (None, None, b"")."""
+        self.proc.stdin.write(f"{name}\n".encode())
+        self.proc.stdin.flush()
+        # "<oid> <type> <size>", or "<name> missing" / "<name> ambiguous"
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            return None, None, b""
+        size = int(header[2])
+        data = self.proc.stdout.read(size + 1)  # Content plus trailing LF
+        return header[0].decode(), header[1], data[:size]
+
+    def get_size(self, name):
+        """Returns the size of an object without reading it (0 if missing)."""
+        if self._check is None:
+            self._check = subprocess.Popen(
+                ["git", "cat-file", "--batch-check"],
+                cwd=self.cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        self._check.stdin.write(f"{name}\n".encode())
+        self._check.stdin.flush()
+        header = self._check.stdout.readline().split()
+        return int(header[2]) if len(header) == 3 else 0
+
+    def get_blob(self, oid):
+        """Get the decoded content of a blob ("" if missing)."""
+        return self._read(oid)[2].decode("utf-8", "ignore")
+
+    def get_blob_bytes(self, oid):
+        """Get the raw bytes of a blob (b"" if missing)."""
+        return self._read(oid)[2]
+
+    def read_tree(self, tree):
+        """Returns (oid, direct entries [(name, is_tree, oid)]) of a tree."""
+        entries = self._trees.get(tree)
+        if entries is not None:
+            return tree, entries
+        entries = []
+        oid, obj_type, data = self._read(tree)
+        if obj_type == b"tree":
+            # Binary entries: "<mode> <name>\0<raw oid>" (SHA-1 or SHA-256)
+            oid_len = len(oid) // 2
+            pos = 0
+            while pos < len(data):
+                space = data.index(b" ", pos)
+                nul = data.index(b"\0", space)
+                end = nul + 1 + oid_len
+                entries.append(
+                    (
+                        data[space + 1 : nul].decode("utf-8", "surrogateescape"),
+                        data[pos:space] == b"40000",
+                        data[nul + 1 : end].hex(),
+                    )
+                )
+                pos = end
+            self._trees[oid] = entries
+        return oid, entries
+
+
+def split_path(file_path):
+    """Splits a '/'-separated path into (basename, extension) in one pass.
+
+    The extension follows os.path.splitext semantics (leading dots are not
+    treated as an extension separator).
+    """
+    basename = file_path.rpartition("/")[2]
+    dot = basename.rfind(".")
+    if dot <= 0 or not basename[:dot].lstrip("."):
+        return basename, ""
+    return basename, basename[dot:]
+
+
+def _count_marker_lines(content, lines, marker):
+    """Counts lines containing marker; a bulk count settles the 0/1 cases."""
+    hits = content.count(marker)
+    if hits <= 1:
+        return hits
+    return sum(marker in line for line in lines)
 
 
 def analyze_content(content):
-    """Analyze the content of a file."""
+    """Analyze the content of a file.
+
+    Returns (non-blank lines, lines with TODO, lines with FIXME), computed with
+    C-level str operations instead of a per-line Python loop.
+    """
     lines = content.splitlines()
-    loc = 0
-    todos = 0
-    fixmes = 0
+    loc = len(lines) - lines.count("") - sum(map(str.isspace, lines))
+    todos = _count_marker_lines(content, lines, _TODO)
+    fixmes = _count_marker_lines(content, lines, _FIXME)
+    return loc, todos, fixmes
 
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            continue
 
-        loc += 1
-        if "TO" + "DO" in line:
-            todos += 1
-        if "FIX" + "ME" in line:
-            fixmes += 1
+def analyze_bytes(data):
+    """Like analyze_content, but on raw bytes so blobs and files skip the decode.
 
+    Counts follow byte rules: only \\r and \\n end a line and only ASCII
+    whitespace makes it blank. The other separators str.splitlines honours
+    (\\x0b, \\x0c, \\x1c-\\x1e, \\x85, U+2028/2029) and non-ASCII spaces
+    do not split or blank lines here.
+    """
+    lines = data.splitlines()
+    loc = len(lines) - lines.count(b"") - sum(map(bytes.isspace, lines))
+    todos = _count_marker_lines(data, lines, _TODO_B)
+    fixmes = _count_marker_lines(data, lines, _FIXME_B)
     return loc, todos, fixmes
 
 
+@lru_cache(maxsize=100_000)
 def is_test_file(file_path):
-    """Check if a file looks like a test file."""
+    """Check if a file looks like a test file (memoized: paths recur per commit)."""
     fp = file_path.lower()
-    basename = os.path.basename(fp)
-    parts = set(fp.split(os.sep))
+    # Wrap in separators so directory checks are plain substring searches
+    wrapped = f"/{fp}/"
+    if "/tests/" in wrapped or "/test/" in wrapped or "/__tests__/" in wrapped:
+        return True
+    basename = fp.rpartition("/")[2]
+    return basename.startswith("test_") or basename.endswith(_TEST_SUFFIXES)
+
+
+def _count_matches(pattern, data):
+    return sum(1 for _ in pattern.finditer(data))
+
+
+def analyze_mapped(buf):
+    """Like analyze_bytes, but regex-scans a buffer (e.g. an mmap) in place."""
     return (
-        not parts.isdisjoint({"test", "tests", "__tests__"})
-        or basename.startswith("test_")
-        or basename.endswith("_test.py")
-        or any(
-            basename.endswith(ext)
-            for ext in [
-                ".test.js",
-                ".test.jsx",
-                ".test.ts",
-                ".test.tsx",
-                ".spec.js",
-                ".spec.jsx",
-                ".spec.ts",
-                ".spec.tsx",
-            ]
-        )
+        _count_matches(_RE_NONBLANK_LINE, buf),
+        _count_matches(_RE_TODO_LINE, buf),
+        _count_matches(_RE_FIXME_LINE, buf),
     )
 
 
 def count_lines_file(file_path):
     """Reads a local file and counts lines/markers."""
     try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return analyze_content(f.read())
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # Same cap as history analysis, so both modes agree
+            if size > _MAX_BLOB_BYTES and os.fspath(file_path).endswith(
+                _SIZE_CAPPED_EXTS
+            ):
+                return 0, 0, 0
+            if size < _MMAP_MIN_BYTES:
+                return analyze_bytes(f.read())
+            # Large files are scanned through a read-only mapping, never copied
+            import mmap
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return analyze_mapped(mm)
     except Exception as e:
         print(f"Error reading {file_path}: {e}", file=sys.stderr)
         return 0, 0, 0
@@ -156,6 +417,26 @@ def count_lines_file(file_path):
 # --- Local Analysis Logic (Migration from ADE_analyze_project.py) ---
 
 
+def _iter_files(root, skip_dirs=frozenset((".git",))):
+    """Yields regular file paths under root using os.scandir.
+
+    Directories named in skip_dirs are pruned before they are opened; by
+    default that is just .git, so a git object database is never walked.
+    Like os.walk, directory symlinks are neither followed nor reported, and
+    FIFOs/sockets are skipped.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+
+
 def run_local_analysis(root_dir, args):
     """Analyzes the current filesystem (Local Mode)."""
 
@@ -183,9 +464,9 @@ def run_local_analysis(root_dir, args):
             # Backend    | 138 passed...        | 82%        | 18s
             # TOTAL                               71.00% code coverage in 87s
 
-            frontend_match = re.search(r"Frontend\s*\|[^|]*\|\s*([\d.]+)%", output)
-            backend_match = re.search(r"Backend\s*\|[^|]*\|\s*([\d.]+)%", output)
-            total_match = re.search(r"TOTAL\s*([\d.]+)%", output)
+            frontend_match = _RE_FRONTEND.search(output)
+            backend_match = _RE_BACKEND.search(output)
+            total_match = _RE_COV.search(output)
 
             if frontend_match:
                 validation_metrics["Frontend"] = frontend_match.group(1)
@@ -199,8 +480,10 @@ def run_local_analysis(root_dir, args):
 
     # Check config
     try:
+        import ADE_config_utils as config_utils
+
         config = config_utils.load_config(root_dir)
-    except NameError:
+    except ImportError:
         config = {}
 
     languages_config = config.get("languages", {})
@@ -223,36 +506,43 @@ def run_local_analysis(root_dir, args):
             for ext in lang_cfg.get("extensions", []):
                 enabled_extensions[ext] = lang_name
 
-    # Use git ls-files to respect .gitignore
+    # Use git ls-files to respect .gitignore; pathspecs let git do the
+    # extension and lockfile/vendor filtering before paths reach Python
     try:
-        cmd = ["git", "ls-files", "--cached", "--others", "--exclude-standard"]
-        git_files = subprocess.check_output(cmd, cwd=root_dir, text=True).splitlines()
+        cmd = ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"]
+        cmd += ["--", *(f":(glob)**/*{ext}" for ext in enabled_extensions)]
+        cmd += [f":(exclude,glob)**/{name}" for name in _LOCAL_EXCLUDES]
+        # NUL-delimited raw paths: no quoting of unusual names, one decode pass
+        output = subprocess.check_output(cmd, cwd=root_dir)
+        git_files = os.fsdecode(output).split("\0")[:-1]
     except subprocess.CalledProcessError:
-        # Fallback to os.walk if not a git repo (unlikely here but safe)
-        git_files = []
-        for root, _, files in os.walk(root_dir):
-            for file in files:
-                git_files.append(os.path.relpath(os.path.join(root, file), root_dir))
+        # Fallback to a filesystem scan if not a git repo (unlikely here but safe)
+        git_files = [
+            rel
+            for rel in (
+                os.path.relpath(p, root_dir)
+                for p in _iter_files(root_dir, _FALLBACK_SKIP_DIRS)
+            )
+            if split_path(rel)[0] not in _LOCKFILES
+        ]
 
+    # Parse every path once up front, keeping (language, path) of files to count.
+    # Paths stay plain strings: open() takes them directly, no Path objects.
+    root = os.fspath(root_dir)
+    targets = []
     for file_rel_path in git_files:
-        file_path = root_dir / file_rel_path
-        filename = os.path.basename(file_rel_path)
-
-        # Skip common lock files
-        if filename in [
-            "package-lock.json",
-            "pnpm-lock.yaml",
-            "yarn.lock",
-            "poetry.lock",
-        ]:
-            continue
-
-        _, ext = os.path.splitext(file_rel_path)
-
-        if ext in enabled_extensions:
-            lang = enabled_extensions[ext]
-            loc, todos, fixmes = count_lines_file(file_path)
-
+        lang = enabled_extensions.get(split_path(file_rel_path)[1])
+        if lang:
+            targets.append((lang, os.path.join(root, file_rel_path)))
+
+    # File reads release the GIL, so a thread pool overlaps their I/O;
+    # map() yields in submission order and totals are summed here
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = pool.map(count_lines_file, [path for _, path in targets])
+        for (lang, _), (loc, todos, fixmes) in zip(targets, counts):
             results[lang]["files"] += 1
             results[lang]["loc"] += loc
             results[lang]["todos"] += todos
@@ -343,9 +633,15 @@ def print_text_table_to_stream(stream, results, sorted_langs, metrics, keys):
 def print_config_results(results_file, markdown=False):
     if not results_file.exists():
         return
+    # orjson parses straight from bytes when installed; stdlib json otherwise
     try:
-        with open(results_file, "r") as f:
-            report = json.load(f)
+        from orjson import loads
+    except ImportError:
+        from json import loads
+
+    try:
+        with open(results_file, "rb") as f:
+            report = loads(f.read())
 
         if markdown:
             print("\n### Configuration Test Results")
@@ -386,7 +682,7 @@ def parse_existing_history(file_path):
     last_commit = None
     with open(file_path, "r") as f:
         for line in f:
-            m = re.search(r"\|\s*\d{4}-\d{2}-\d{2}\s*\|\s*`([^`]+)`", line)
+            m = _RE_HIST_ROW.search(line)
             if m:
                 last_commit = m.group(1)
                 break
@@ -397,21 +693,18 @@ def parse_requirements_content(content):
     """Counts total and open requirements from markdown content."""
     total = 0
     open_reqs = 0
-    # Look for table rows starting with | **REQ-
-    lines = content.splitlines()
-    for line in lines:
-        if re.search(r"\|\s*\*\*REQ-\d+\*\*", line):
-            total += 1
-            # Check Status column (index 2 usually)
-            parts = [p.strip() for p in line.split("|")]
-            if len(parts) > 3:
-                status = parts[3].lower()
-                # Open if Planned, Partial, Designed, or In Progress
-                if any(
-                    s in status
-                    for s in ["planned", "partial", "designed", "in progress"]
-                ):
-                    open_reqs += 1
+    # One scan for table rows starting with | **REQ-, capturing the Status
+    # column (index 3 of the pipe-split row) when the row has one
+    for m in _RE_REQ_ROW.finditer(content):
+        total += 1
+        status = m.group(1)
+        if status is not None:
+            status = status.strip().lower()
+            # Open if Planned, Partial, Designed, or In Progress
+            if any(
+                s in status for s in ["planned", "partial", "designed", "in progress"]
+            ):
+                open_reqs += 1
     return open_reqs, total
 
 
@@ -419,76 +712,166 @@ def parse_issues_content(content):
     """Counts total and open issues from markdown content."""
     total = 0
     open_issues = 0
-    # Look for table rows starting with
+    # One scan for table rows starting with
     # | **CR- / **HP- / **LP- / **DS- / **DX- / **DEF- / **SEC- / **TASK- / **TECH-
-    lines = content.splitlines()
-    for line in lines:
-        if re.search(r"\|\s*\*\*(?:CR|HP|LP|DS|DX|DEF|SEC|TASK|TECH)-", line):
-            total += 1
-            # Check Status column
-            parts = [p.strip().lower() for p in line.split("|")]
-            # Search for status in columns 2-5
-            is_closed = any(
-                any(s in col for s in ["fixed", "resolved", "done", "complete", "✅"])
-                for col in parts[2:6]
-            )
-            if not is_closed:
-                open_issues += 1
+    for m in _RE_ISSUE_ROW.finditer(content):
+        total += 1
+        # Check Status column
+        parts = [p.strip().lower() for p in m.group().split("|")]
+        # Search for status in columns 2-5
+        is_closed = any(
+            any(s in col for s in ["fixed", "resolved", "done", "complete", "✅"])
+            for col in parts[2:6]
+        )
+        if not is_closed:
+            open_issues += 1
     return open_issues, total
 
 
 def parse_data_row(line):
     """Parses a markdown table row into a data dictionary."""
-    parts = [p.strip() for p in line.split("|")]
-    # Expected: ['', Date, Commit, Author, Total, Py, TS, MD, CSS, SH, JSON, TestFiles, TestLOC, TP,
-    # TT, TS, TODOs, FIXMEs, Req, Iss, '']
-    if len(parts) < 20:
+    # Expected: | Date | Commit | Author | Total | Py | TS | MD | CSS | SH | JSON |
+    # TestFiles | TestLOC | TP | TT | TS | TODOs | FIXMEs | Req | Iss |
+    # One anchored regex rejects headers, separators and prose and captures
+    # every numeric column in the same pass.
+    m = _RE_ROW_FIELDS.match(line)
+    if not m:
         return None
+    date, *counts = m.groups()
+    return {"date": date, **dict(zip(_ROW_KEYS, map(int, counts)))}
+
+
+# Per-process memo of blob analysis, keyed by git blob oid (content-addressed,
+# so entries never go stale): oid -> (loc, todos, fixmes)
+_BLOB_STATS = {}
+# (REQUIREMENTS.md / ISSUES.md path, blob oid) -> (open, total)
+_DOC_STATS = {}
+# (path prefix, tree oid) -> {stats key: count} summed over every file beneath.
+# A file's contribution depends only on its path and blob, so an unchanged
+# subtree at the same place is reused whole: per-commit work is proportional
+# to the subtrees the commit changed, not to the size of the tree.
+_TREE_STATS = {}
+
+
+def _add_file_stats(batch, file_path, oid, agg):
+    """Adds one file's contribution to the stats counts in `agg`."""
+    # Special Handling for Requirements and Issues
+    if file_path == "docs/REQUIREMENTS.md":
+        counts = _DOC_STATS.get((file_path, oid))
+        if counts is None:
+            counts = parse_requirements_content(batch.get_blob(oid))
+            _DOC_STATS[file_path, oid] = counts
+        agg["open_reqs"], agg["total_reqs"] = counts
+    elif file_path == "docs/ISSUES.md":
+        counts = _DOC_STATS.get((file_path, oid))
+        if counts is None:
+            counts = parse_issues_content(batch.get_blob(oid))
+            _DOC_STATS[file_path, oid] = counts
+        agg["open_issues"], agg["total_issues"] = counts
+
+    filename, ext = split_path(file_path)
+    keys = _EXT_KEYS.get(ext)
+    if keys is None:
+        return
+    todo_key, fixme_key, src_key, test_key = keys
+
+    # Unchanged files keep their blob oid across commits: analyze once
+    counts = _BLOB_STATS.get(oid)
+    if counts is None:
+        # Oversized bundles/generated data are never transferred; only the
+        # extensions they come in pay for the size query
+        if ext in _SIZE_CAPPED_EXTS and batch.get_size(oid) > _MAX_BLOB_BYTES:
+            counts = (0, 0, 0)
+        else:
+            counts = analyze_bytes(batch.get_blob_bytes(oid))
+        _BLOB_STATS[oid] = counts
+    loc, todos, fixmes = counts
 
-    try:
-        # Extract date from | YYYY-MM-DD |
-        date = parts[1]
-        if not re.match(r"\d{4}-\d{2}-\d{2}", date):
-            return None
-
-        return {
-            "date": date,
-            "loc_total": int(parts[4]),
-            "loc_py": int(parts[5]),
-            "loc_ts": int(parts[6]),
-            "loc_md": int(parts[7]),
-            "loc_css": int(parts[8]),
-            "loc_sh": int(parts[9]),
-            "loc_json": int(parts[10]),
-            "test_files": int(parts[11]),
-            "test_loc_total": int(parts[12]),
-            "test_loc_py": int(parts[13]),
-            "test_loc_ts": int(parts[14]),
-            "test_loc_sh": int(parts[15]),
-            # Markers in the new table are split Format: "Code / MD"
-            "todos": int(parts[16].split("/")[0]),
-            "md_todos": int(parts[16].split("/")[1]),
-            "fixmes": int(parts[17].split("/")[0]),
-            "md_fixmes": int(parts[17].split("/")[1]),
-            "open_reqs": int(parts[18].split("/")[0]),
-            "total_reqs": int(parts[18].split("/")[1]),
-            "open_issues": int(parts[19].split("/")[0]),
-            "total_issues": int(parts[19].split("/")[1]),
-        }
-    except (ValueError, IndexError):
-        return None
+    agg[todo_key] = agg.get(todo_key, 0) + todos
+    agg[fixme_key] = agg.get(fixme_key, 0) + fixmes
+
+    if is_test_file(file_path):
+        agg["test_files"] = agg.get("test_files", 0) + 1
+        total_key = "test_loc_total"
+        key = test_key
+    else:
+        # Non-test source code (lock files only ever reach here as .json)
+        total_key = "loc_total"
+        key = None if filename in _LOCKFILES else src_key
+    agg[total_key] = agg.get(total_key, 0) + loc
+    if key:
+        agg[key] = agg.get(key, 0) + loc
+
+
+def _tree_stats(batch, tree, prefix):
+    """Returns the summed stats counts of every file under `tree` at `prefix`."""
+    oid, entries = batch.read_tree(tree)
+    agg = _TREE_STATS.get((prefix, oid))
+    if agg is None:
+        agg = {}
+        for name, is_tree, entry_oid in entries:
+            if is_tree:
+                sub = _tree_stats(batch, entry_oid, f"{prefix}{name}/")
+                for key, count in sub.items():
+                    agg[key] = agg.get(key, 0) + count
+            else:
+                _add_file_stats(batch, prefix + name, entry_oid, agg)
+        _TREE_STATS[prefix, oid] = agg
+    return agg
+
+
+def analyze_commit(batch, commit):
+    """Computes the stats row of one commit, reading its files through `batch`."""
+    stats = {
+        "commit": commit["hash"][:7],
+        "date": commit["date"],
+        "author": commit["author"],
+        "todos": 0,
+        "fixmes": 0,
+        "md_todos": 0,
+        "md_fixmes": 0,
+        # Source code LOC (non-test)
+        "loc_python": 0,
+        "loc_typescript": 0,
+        "loc_markdown": 0,
+        "loc_css": 0,
+        "loc_shell": 0,
+        "loc_json": 0,
+        "loc_total": 0,
+        # Test code LOC
+        "test_loc_python": 0,
+        "test_loc_typescript": 0,
+        "test_loc_shell": 0,
+        "test_loc_total": 0,
+        "test_files": 0,
+        "open_reqs": 0,
+        "total_reqs": 0,
+        "open_issues": 0,
+        "total_issues": 0,
+    }
+    for key, count in _tree_stats(batch, f"{commit['hash']}^{{tree}}", "").items():
+        stats[key] += count
+    return stats
+
+
+def _analyze_commit_chunk(cwd, commits):
+    """Process-pool worker: analyzes consecutive commits with its own cat-file."""
+    with GitCatFile(cwd) as batch:
+        return [analyze_commit(batch, commit) for commit in commits]
 
 
 def run_history_analysis(root_dir, args):
     cwd = root_dir
     since_commit = args.since
 
+    existing_text = ""
     existing_content = []
 
     # Hardcoded output path in docs/
-    output_path = root_dir / "docs" / "HISTORY.md"
+    docs_dir = root_dir / "docs"
+    output_path = docs_dir / "HISTORY.md"
     # Ensure docs directory exists
-    output_path.parent.mkdir(exist_ok=True)
+    docs_dir.mkdir(exist_ok=True)
 
     # Incremental Logic
     if args.incremental and os.path.exists(output_path):
@@ -499,6 +882,13 @@ def run_history_analysis(root_dir, args):
         last_tracked = parse_existing_history(output_path)
         if last_tracked:
             print(f"Found last tracked commit: {last_tracked}", file=sys.stderr)
+
+            # Cheap no-op check: if HEAD is already tracked, skip the log walk
+            head = run_git_command(["rev-parse", "HEAD"], cwd)
+            if head and head.startswith(last_tracked):
+                print("No new commits to analyze.", file=sys.stderr)
+                return
+
             # If we tried to assume that last_commit is part of history, we use it as 'since'
             # Note: git log range is exclusive of the 'since' commit usually (since..HEAD)
             since_commit = last_tracked
@@ -506,14 +896,15 @@ def run_history_analysis(root_dir, args):
             # Read existing content to preserve it (excluding header if we rewrite)
             # Actually, simpler to just read the whole file, strip header, and append to new rows
             with open(output_path, "r") as f:
-                existing_content = f.readlines()
+                existing_text = f.read()
+            existing_content = existing_text.splitlines()
         else:
             print(
                 "No existing history found in output file. Running full analysis.",
                 file=sys.stderr,
             )
 
-    commits = get_commits(cwd, args.limit, since_commit)
+    commits = get_commits(cwd, args.limit, since_commit, args.no_merges)
 
     # If using 'since', the commits returned are new ones.
     # If we are strictly prepending new data to old data,
@@ -530,201 +921,72 @@ def run_history_analysis(root_dir, args):
         commits.reverse()
 
     history_data = []
-    lang_map = {
-        ".py": "python",
-        ".js": "javascript",
-        ".jsx": "javascript",
-        ".ts": "typescript",
-        ".tsx": "typescript",
-        ".md": "markdown",
-        ".css": "css",
-        ".sh": "shell",
-        ".json": "json",
-    }
-
-    processed_count = 0
-    for commit in commits:
-        processed_count += 1
-        print(
-            f"[{processed_count}/{len(commits)}] Processing {commit['hash'][:7]}...",
-            file=sys.stderr,
-            end="\r",
-        )
-
-        files = get_files_at_commit(cwd, commit["hash"])
-        stats = {
-            "commit": commit["hash"][:7],
-            "date": commit["date"],
-            "author": commit["author"],
-            "todos": 0,
-            "fixmes": 0,
-            "md_todos": 0,
-            "md_fixmes": 0,
-            # Source code LOC (non-test)
-            "loc_python": 0,
-            "loc_typescript": 0,
-            "loc_markdown": 0,
-            "loc_css": 0,
-            "loc_shell": 0,
-            "loc_json": 0,
-            "loc_total": 0,
-            # Test code LOC
-            "test_loc_python": 0,
-            "test_loc_typescript": 0,
-            "test_loc_shell": 0,
-            "test_loc_total": 0,
-            "test_files": 0,
-            "open_reqs": 0,
-            "total_reqs": 0,
-            "open_issues": 0,
-            "total_issues": 0,
-        }
-
-        for file_path in files:
-            # Special Handling for Requirements and Issues
-            if file_path == "docs/REQUIREMENTS.md":
-                content = get_file_content_git(cwd, commit["hash"], file_path)
-                stats["open_reqs"], stats["total_reqs"] = parse_requirements_content(
-                    content
+    # Large histories are split into contiguous chunks analyzed in parallel;
+    # each worker keeps its own cat-file process and tree cache.
+    workers = min(os.cpu_count() or 1, len(commits) // _COMMITS_PER_WORKER)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunk_size = -(-len(commits) // (workers * 4))
+        chunks = [
+            commits[i : i + chunk_size] for i in range(0, len(commits), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_analyze_commit_chunk, cwd, chunk) for chunk in chunks
+            ]
+            for future in futures:
+                history_data.extend(future.result())
+                print(
+                    f"[{len(history_data)}/{len(commits)}] Processed "
+                    f"{history_data[-1]['commit']}...",
+                    file=sys.stderr,
+                    end="\r",
                 )
-            elif file_path == "docs/ISSUES.md":
-                content = get_file_content_git(cwd, commit["hash"], file_path)
-                stats["open_issues"], stats["total_issues"] = parse_issues_content(
-                    content
+    else:
+        # One cat-file process serves every tree and blob read of the traversal
+        with GitCatFile(cwd) as batch:
+            for processed_count, commit in enumerate(commits, 1):
+                print(
+                    f"[{processed_count}/{len(commits)}] Processing "
+                    f"{commit['hash'][:7]}...",
+                    file=sys.stderr,
+                    end="\r",
                 )
-
-            ext = os.path.splitext(file_path)[1]
-            if ext not in lang_map:
-                continue
-
-            content = get_file_content_git(cwd, commit["hash"], file_path)
-            loc, todos, fixmes = analyze_content(content)
-
-            lang = lang_map[ext]
-            if lang == "markdown":
-                stats["md_todos"] += todos
-                stats["md_fixmes"] += fixmes
-            else:
-                stats["todos"] += todos
-                stats["fixmes"] += fixmes
-            is_test = is_test_file(file_path)
-
-            if is_test:
-                stats["test_files"] += 1
-                stats["test_loc_total"] += loc
-                if lang == "python":
-                    stats["test_loc_python"] += loc
-                elif lang in ["typescript", "javascript"]:
-                    stats["test_loc_typescript"] += loc
-                elif lang == "shell":
-                    stats["test_loc_shell"] += loc
-            else:
-                # Non-test source code
-                stats["loc_total"] += loc
-                if lang == "python":
-                    stats["loc_python"] += loc
-                elif lang in ["typescript", "javascript"]:
-                    stats["loc_typescript"] += loc
-                elif lang == "markdown":
-                    stats["loc_markdown"] += loc
-                elif lang == "css":
-                    stats["loc_css"] += loc
-                elif lang == "shell":
-                    stats["loc_shell"] += loc
-                elif lang == "json":
-                    filename = os.path.basename(file_path)
-                    if filename not in [
-                        "package-lock.json",
-                        "pnpm-lock.yaml",
-                        "yarn.lock",
-                        "poetry.lock",
-                    ]:
-                        stats["loc_json"] += loc
-
-        history_data.append(stats)
+                history_data.append(analyze_commit(batch, commit))
 
     print("\nAnalysis complete.", file=sys.stderr)
 
-    # Generate Report Rows
-    new_rows = []
-    for row in history_data:
-        # Table Includes BOTH (C / M)
-        todo_str = f"{row['todos']} / {row['md_todos']}"
-        fixme_str = f"{row['fixmes']} / {row['md_fixmes']}"
-        req_str = f"{row['open_reqs']} / {row['total_reqs']}"
-        iss_str = f"{row['open_issues']} / {row['total_issues']}"
-        new_rows.append(
-            f"| {row['date']} | `{row['commit']}` | {row['author']} | "
-            f"{row['loc_total']} | {row['loc_python']} | {row['loc_typescript']} | "
-            f"{row['loc_markdown']} | {row['loc_css']} | {row['loc_shell']} | {row['loc_json']} | "
-            f"{row['test_files']} | {row['test_loc_total']} | {row['test_loc_python']} | "
-            f"{row['test_loc_typescript']} | {row['test_loc_shell']} | {todo_str} | {fixme_str} | "
-            f"{req_str} | {iss_str} |"
-        )
+    import hashlib
+    from datetime import datetime
 
-    # COMBINING
-    final_output = []
-    if not existing_content:
-        final_output.append("# Project History Analysis")
-        final_output.append(f"Generated on {datetime.now().isoformat()}")
-        final_output.append("")
-        final_output.append(
-            "| Date | Commit | Author | Total | Py | TS/JS | MD | CSS | SH | JSON | Tests | "
-            "T-LOC | "
-            "Py-T | TS-T | SH-T | TODO (C/M) | FIXME (C/M) | Req | Iss |"
-        )
-        final_output.append(
-            "|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|"
-        )
-        final_output.extend(new_rows)
-    else:
-        # We need to insert new rows after the header.
-        # Heuristic: Find the separator line for the main table
-        # We skip any charts/summaries that were already at the top
-        sep_index = -1
-        for i, line in enumerate(existing_content):
-            if line.strip().startswith("|---"):
-                sep_index = i
-                break
+    # Mermaid arrays are serialized with orjson when installed, stdlib otherwise.
+    # Both emit compact separators so the report text and chart keys are
+    # byte-identical either way.
+    try:
+        import orjson
 
-        if sep_index != -1:
-            # We want to REBUILD the part BEFORE the table to have valid current summaries/charts
-            # but we keep the table rows.
-            final_output.append("# Project History Analysis")
-            final_output.append(f"Generated on {datetime.now().isoformat()}")
-            final_output.append("")
-            # Charts will be inserted at index 2 later
+        def dumps(obj):
+            return orjson.dumps(obj).decode()
 
-            # The header is actually 1 line before sep_index
-            header_line = (
-                "| Date | Commit | Author | Total | Py | TS/JS | MD | CSS | SH | "
-                "JSON | Tests | T-LOC | Py-T | TS-T | SH-T | TODO (C/M) | "
-                "FIXME (C/M) | Req | Iss |"
-            )
-            sep_line = "|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|"
+    except ImportError:
+        import json
 
-            final_output.append(header_line)
-            final_output.append(sep_line)
+        def dumps(obj):
+            return json.dumps(obj, separators=(",", ":"))
 
-            # Insert NEW rows
-            final_output.extend(new_rows)
-            # Append old rows
-            final_output.extend(
-                line.strip() for line in existing_content[sep_index + 1 :]
-            )
-        else:
-            # Could not find table structure, just append?
-            final_output.extend(line.strip() for line in existing_content)
-            final_output.extend(new_rows)
+    # Generate Report Rows
+    new_rows = [_ROW_TEMPLATE % row for row in history_data]
 
     # Sort data for graphing (Oldest -> Newest)
     # Build graph data by combining parsed existing data and newly processed data
     daily_data = {}
 
     # 1. Parse existing data from file if available
+    # One regex scan over the whole file picks out candidate data rows
     if existing_content:
-        for line in existing_content:
-            row_data = parse_data_row(line)
+        for m in _RE_DATA_ROW.finditer(existing_text):
+            row_data = parse_data_row(m.group())
             if row_data:
                 # Since we often have multiple commits per day, we store the LATEST state
                 # of that day
@@ -767,7 +1029,8 @@ def run_history_analysis(root_dir, args):
             }
 
     graph_data = list(daily_data.values())
-    # Sort by date ascending for the chart
+    # Sort by date ascending for the chart. Dates must stay ISO-8601
+    # (YYYY-MM-DD) so that plain string order is chronological.
     graph_data.sort(key=lambda x: x["date"])
 
     # Generate Charts
@@ -784,59 +1047,71 @@ def run_history_analysis(root_dir, args):
             self.x_labels = []
 
         def add_line(self, data, label, color):
+            # All-zero series add nothing but a flat line on the axis; skip them
+            if not any(data):
+                return
             self.lines.append({"data": data, "label": label, "color": color})
 
+        def reset(self, title):
+            """Starts a new chart on the same x axis: drops lines, keeps labels."""
+            self.title = title
+            self.lines = []
+
         def set_x_labels(self, labels):
             self.x_labels = labels
 
-        def generate(self):
-            # Calculate ranges
-            all_values = [v for line in self.lines for v in line["data"]]
-            if not all_values:
-                return ""
-            max_val = max(all_values)
+        def generate(self, out):
+            """Writes the chart SVG to the text stream `out`."""
+            # Calculate ranges (per-series max runs in C; no flattened copy).
+            # With every series skipped as all-zero, still draw the empty axes.
+            series = [line["data"] for line in self.lines]
+            if not series and not self.x_labels:
+                return
+            max_val = max(map(max, series), default=0)
             min_val = 0  # Always start at 0 for context
 
-            # Helper for scaling
+            # Plot area
+            plot_bottom = self.height - self.padding
+            plot_top = self.padding
+            plot_left = self.padding
+            plot_right = self.width - self.padding
+            plot_width = plot_right - plot_left
+
+            # Affine transforms, with the divisions hoisted out of the per-point
+            # path. Coordinates are rounded to 2 decimals: finer precision is
+            # invisible and only bloats the SVG.
+            y_scale = (plot_bottom - plot_top) / (max_val - min_val or 1)
+
             def get_y(val):
-                if max_val == min_val:
-                    return self.height - self.padding
-                ratio = (val - min_val) / (max_val - min_val)
-                plot_height = self.height - (2 * self.padding)
-                return self.height - self.padding - (ratio * plot_height)
-
-            def get_x(idx, count):
-                plot_width = self.width - (2 * self.padding)
+                return round(plot_bottom - (val - min_val) * y_scale, 2)
+
+            def get_xs(indices, count):
                 if count <= 1:
-                    return self.padding + (plot_width / 2)
-                step = plot_width / (count - 1)
-                return self.padding + (idx * step)
+                    return [round(plot_left + plot_width / 2, 2) for _ in indices]
+                x_scale = plot_width / (count - 1)
+                return [round(plot_left + i * x_scale, 2) for i in indices]
 
-            svg = [
+            write = out.write
+            write(
                 f'<svg width="{self.width}" height="{self.height}" xmlns="http://www.w3.org/2000/svg">'
-            ]
+            )
 
             # Background
-            svg.append('<rect width="100%" height="100%" fill="white" />')
+            write('<rect width="100%" height="100%" fill="white" />')
 
             # Title
-            svg.append(
+            write(
                 f'<text x="{self.width / 2}" y="30" text-anchor="middle" '
                 f'font-family="sans-serif" font-size="20" font-weight="bold">'
-                f"{self.title}</text>"
+                f"{self.title.translate(_XML_ESCAPE)}</text>"
             )
 
             # Axes
-            plot_bottom = self.height - self.padding
-            plot_top = self.padding
-            plot_left = self.padding
-            plot_right = self.width - self.padding
-
-            svg.append(
+            write(
                 f'<line x1="{plot_left}" y1="{plot_bottom}" x2="{plot_right}" '
                 f'y2="{plot_bottom}" stroke="black" stroke-width="2"/>'
             )  # X Axis
-            svg.append(
+            write(
                 f'<line x1="{plot_left}" y1="{plot_bottom}" x2="{plot_left}" '
                 f'y2="{plot_top}" stroke="black" stroke-width="2"/>'
             )  # Y Axis
@@ -845,33 +1120,32 @@ def run_history_analysis(root_dir, args):
             for i in range(6):
                 val = min_val + (max_val - min_val) * (i / 5)
                 y = get_y(val)
-                svg.append(
+                write(
                     f'<line x1="{plot_left - 5}" y1="{y}" x2="{plot_left}" '
                     f'y2="{y}" stroke="black"/>'
                 )
-                svg.append(
-                    f'<text x="{plot_left - 10}" y="{y + 5}" text-anchor="end" '
-                    f'font-family="sans-serif" font-size="12">{int(val)}</text>'
+                write(
+                    f'<text x="{plot_left - 10}" y="{round(y + 5, 2)}" text-anchor="end" '
+                    f"{_TEXT_ATTRS}>{int(val)}</text>"
                 )
-                svg.append(
+                write(
                     f'<line x1="{plot_left}" y1="{y}" x2="{plot_right}" y2="{y}" '
-                    f'stroke="#ddd" stroke-dasharray="4"/>'
+                    f"{_GRID_ATTRS}/>"
                 )  # Grid
 
             # X Labels (Sampled if too many) - Simplified logic
             count = len(self.x_labels)
-            step = max(1, count // 10)
-            for i in range(0, count, step):
-                x = get_x(i, count)
-                svg.append(
+            label_indices = range(0, count, max(1, count // 10))
+            for i, x in zip(label_indices, get_xs(label_indices, count)):
+                write(
                     f'<line x1="{x}" y1="{plot_bottom}" x2="{x}" '
                     f'y2="{plot_bottom + 5}" stroke="black"/>'
                 )
-                svg.append(
+                write(
                     f'<text x="{x}" y="{plot_bottom + 10}" text-anchor="start" '
-                    f'font-family="sans-serif" font-size="10" '
+                    f"{_LABEL_ATTRS} "
                     f'transform="rotate(45, {x}, {plot_bottom + 10})">'
-                    f"{self.x_labels[i]}</text>"
+                    f"{self.x_labels[i].translate(_XML_ESCAPE)}</text>"
                 )
 
             # Legend
@@ -879,48 +1153,95 @@ def run_history_analysis(root_dir, args):
             legend_y = plot_top
             for i, line in enumerate(self.lines):
                 ly = legend_y + (i * 20)
-                svg.append(
+                write(
                     f'<rect x="{legend_x}" y="{ly}" width="10" height="10" fill="{line["color"]}"/>'
                 )
-                svg.append(
+                write(
                     f'<text x="{legend_x + 15}" y="{ly + 10}" '
-                    f'font-family="sans-serif" font-size="12">{line["label"]}</text>'
+                    f"{_TEXT_ATTRS}>{line['label'].translate(_XML_ESCAPE)}</text>"
                 )
 
-            # Lines
+            # Lines: one <polyline> per series, points built in a single join.
+            # Long series are decimated by stride to ~1 vertex per pixel (the
+            # last sample is always kept); sub-pixel vertices are invisible.
+            # Series of equal length share sample indices and x positions.
+            max_points = plot_right - plot_left
+            samples_by_count = {}
             for line in self.lines:
-                points = []
                 data = line["data"]
-                for i, val in enumerate(data):
-                    x = get_x(i, len(data))
-                    y = get_y(val)
-                    points.append(f"{x},{y}")
-
-                polyline = (
-                    f'<polyline points="{" ".join(points)}" fill="none" '
-                    f'stroke="{line["color"]}" stroke-width="2"/>'
+                count = len(data)
+                samples = samples_by_count.get(count)
+                if samples is None:
+                    indices = range(count)
+                    if count > max_points:
+                        stride = -(-count // max_points)
+                        indices = list(range(0, count, stride))
+                        if indices[-1] != count - 1:
+                            indices.append(count - 1)
+                    xs = get_xs(indices, count)
+                    # Polyline vertices snap to whole pixels: int formatting is
+                    # cheaper than float and the path text is shorter
+                    pixel_xs = [round(x) for x in xs]
+                    samples = samples_by_count[count] = (indices, xs, pixel_xs)
+                indices, xs, pixel_xs = samples
+                stroke = f'stroke="{line["color"]}" stroke-width="2"/>'
+
+                if min(data) == max(data):
+                    # Constant series: a single segment instead of N points
+                    y = get_y(data[0])
+                    write(
+                        f'<line x1="{xs[0]}" y1="{y}" x2="{xs[-1]}" y2="{y}" {stroke}'
+                    )
+                    continue
+
+                # get_y inlined: this is the only per-point loop of the chart
+                points = " ".join(
+                    [
+                        f"{x},{round(plot_bottom - (data[i] - min_val) * y_scale)}"
+                        for i, x in zip(indices, pixel_xs)
+                    ]
                 )
-                svg.append(polyline)
+                write(f'<polyline points="{points}" fill="none" {stroke}')
 
-            svg.append("</svg>")
-            return "\n".join(svg)
+            write("</svg>")
 
     # Assets Setup
-    assets_dir = root_dir / "docs" / "history_assets"
+    assets_dir = docs_dir / "history_assets"
     assets_dir.mkdir(exist_ok=True)
+    # Chart links are relative to the report; resolve the prefix once
+    assets_rel = os.path.relpath(assets_dir, docs_dir)
 
     def generate_chart(title, generator_func, filename_base, mermaid_def):
-        """Generates a chart using SVG generator, falling back to mermaid block if needed."""
+        """Generates a chart using SVG generator, falling back to mermaid block if needed.
+
+        The SVG is only rebuilt when its data changed: the mermaid definition
+        carries the title and every series, so its hash is stored in a sidecar
+        `.svg.key` file and compared on the next run.
+        """
+        # A single day of history has no trend to plot: skip the SVG/mermaid work
+        if len(graph_data) < 2:
+            return f"_{title}: chart skipped, insufficient data points._"
         if assets_dir:
             output_svg = assets_dir / f"{filename_base}.svg"
+            key_file = assets_dir / f"{filename_base}.svg.key"
+            key = hashlib.blake2b(
+                f"{_CHART_VERSION}\n{mermaid_def}".encode(), digest_size=16
+            ).hexdigest()
 
             try:
-                svg_content = generator_func()
-                with open(output_svg, "w") as f:
-                    f.write(svg_content)
+                rel_path = f"{assets_rel}/{filename_base}.svg"
+                if (
+                    output_svg.exists()
+                    and key_file.exists()
+                    and key_file.read_text() == key
+                ):
+                    return f"![{title}]({rel_path})"
+
+                # Stream the SVG straight into a buffered file
+                with open(output_svg, "w", buffering=1 << 16) as f:
+                    generator_func(f)
+                key_file.write_text(key)
 
-                # Relativize path for the link
-                rel_path = os.path.relpath(output_svg, output_path.parent)
                 return f"![{title}]({rel_path})"
             except Exception as e:
                 print(
@@ -937,8 +1258,10 @@ def run_history_analysis(root_dir, args):
         start_loc = graph_data[0]["loc_total"]
         end_loc = graph_data[-1]["loc_total"]
 
-        d1 = datetime.strptime(start_date_str, "%Y-%m-%d")
-        d2 = datetime.strptime(end_date_str, "%Y-%m-%d")
+        # ISO dates from `git log --date=short`: fromisoformat is a C parser
+        # and skips strptime's format/locale machinery (and its import)
+        d1 = datetime.fromisoformat(start_date_str)
+        d2 = datetime.fromisoformat(end_date_str)
         days = (d2 - d1).days
 
         # If days is 0 (same day), avoid division by zero
@@ -949,16 +1272,16 @@ def run_history_analysis(root_dir, args):
         # --- SUMMARY TABLES ---
         latest = graph_data[-1]
 
-        def calc_cov(test, source):
-            total = test + source
-            if total == 0:
-                return 0.0
-            return (test / total) * 100.0
-
-        py_ratio = calc_cov(latest["test_loc_py"], latest["loc_py"])
-        ts_ratio = calc_cov(latest["test_loc_ts"], latest["loc_ts"])
-        sh_ratio = calc_cov(latest["test_loc_sh"], latest["loc_sh"])
-        total_ratio = calc_cov(latest["test_loc_total"], latest["loc_total"])
+        # Test density: test share of (test + source) LOC, in percent
+        py_ratio, ts_ratio, sh_ratio, total_ratio = [
+            (test / (test + source)) * 100.0 if test + source else 0.0
+            for test, source in (
+                (latest["test_loc_py"], latest["loc_py"]),
+                (latest["test_loc_ts"], latest["loc_ts"]),
+                (latest["test_loc_sh"], latest["loc_sh"]),
+                (latest["test_loc_total"], latest["loc_total"]),
+            )
+        ]
 
         summary_section = [
             "## Summary",
@@ -974,17 +1297,9 @@ def run_history_analysis(root_dir, args):
                 with open(val_summary, "r") as f:
                     content = f.read()
                     # Parse Coverage
-                    m_cov = re.search(r"TOTAL\s*([\d.]+)%", content)
-                    # Parse Timings
-                    timings = []
-                    for line in content.splitlines():
-                        if "TIMING_METRIC:" in line:
-                            # TIMING_METRIC: Backend=18s
-                            m_time = re.search(
-                                r"TIMING_METRIC:\s*([^=]+)=([\d.]+)s", line
-                            )
-                            if m_time:
-                                timings.append((m_time.group(1), m_time.group(2)))
+                    m_cov = _RE_COV.search(content)
+                    # Parse Timings, e.g. "TIMING_METRIC: Backend=18s"
+                    timings = _RE_TIMING.findall(content)
 
                     if m_cov:
                         summary_section.extend(
@@ -1002,62 +1317,68 @@ def run_history_analysis(root_dir, args):
                         )
 
                     if timings:
-                        summary_section.extend(
-                            [
-                                "### Verification Timings",
-                                "| Phase | Duration |",
-                                "| :--- | :--- |",
-                            ]
-                        )
+                        # One pass: phase rows in order, first Total kept for last
+                        rows = [
+                            "### Verification Timings",
+                            "| Phase | Duration |",
+                            "| :--- | :--- |",
+                        ]
+                        total_time = None
                         for phase, duration in timings:
-                            if phase != "Total":  # Put total last or separately
-                                summary_section.append(f"| {phase} | {duration}s |")
-
-                        # Find Total
-                        total_time = next(
-                            (d for p, d in timings if p == "Total"), "N/A"
-                        )
-                        summary_section.extend(
-                            [f"| **Total** | **{total_time}s** |", ""]
-                        )
+                            if phase != "Total":
+                                rows.append(f"| {phase} | {duration}s |")
+                            elif total_time is None:
+                                total_time = duration
+                        rows.append(f"| **Total** | **{total_time or 'N/A'}s** |")
+                        summary_section.extend(("\n".join(rows), ""))
             except Exception:
                 pass
 
-        # 2. Test Density Analysis
-        summary_section.extend(
-            [
-                "### Test Density Analysis (Latest)",
-                "| Language | Source LOC | Test LOC | Density % |",
-                "| :--- | :--- | :--- | :--- |",
-                f"| Python | {latest['loc_py']:,} | {latest['test_loc_py']:,} | {py_ratio:.1f}% |",
-                f"| TS/JS | {latest['loc_ts']:,} | {latest['test_loc_ts']:,} | {ts_ratio:.1f}% |",
-                f"| Shell | {latest['loc_sh']:,} | {latest['test_loc_sh']:,} | {sh_ratio:.1f}% |",
-                f"| **Total** | **{latest['loc_total']:,}** | **{latest['test_loc_total']:,}** | "
-                f"**{total_ratio:.1f}%** |",
-                "",
-                "> [!NOTE]",
-                "> **Test Density** is a static LOC ratio (Test Code / Production Code).",
-                "",
-            ]
+        # 2. Test Density Analysis (one pre-joined block)
+        summary_section.append(
+            "\n".join(
+                (
+                    "### Test Density Analysis (Latest)",
+                    "| Language | Source LOC | Test LOC | Density % |",
+                    "| :--- | :--- | :--- | :--- |",
+                    f"| Python | {latest['loc_py']:,} | {latest['test_loc_py']:,} | "
+                    f"{py_ratio:.1f}% |",
+                    f"| TS/JS | {latest['loc_ts']:,} | {latest['test_loc_ts']:,} | "
+                    f"{ts_ratio:.1f}% |",
+                    f"| Shell | {latest['loc_sh']:,} | {latest['test_loc_sh']:,} | "
+                    f"{sh_ratio:.1f}% |",
+                    f"| **Total** | **{latest['loc_total']:,}** | "
+                    f"**{latest['test_loc_total']:,}** | **{total_ratio:.1f}%** |",
+                    "",
+                    "> [!NOTE]",
+                    "> **Test Density** is a static LOC ratio (Test Code / Production Code).",
+                    "",
+                )
+            )
         )
 
-        # 3. Technical Debt
-        summary_section.extend(
-            [
-                "### Technical Debt (Latest)",
-                "| Category | Progress / Count | Status |",
-                "| :--- | :--- | :--- |",
-                f"| Requirements | {latest['total_reqs'] - latest['open_reqs']} / "
-                f"{latest['total_reqs']} | {latest['open_reqs']} Pending |",
-                f"| Issues | {latest['total_issues'] - latest['open_issues']} / "
-                f"{latest['total_issues']} | {latest['open_issues']} Open |",
-                f"| TODOs | {latest['todos']} | {latest['todos']} code markers shown in graph |",
-                f"| FIXMEs | {latest['fixmes']} | {latest['fixmes']} code markers shown in graph |",
-                "> [!NOTE]",
-                "> Markdown markers (TODO/FIXME) excluded from debt chart. Requirements and Issues "
-                "tracked via `REQUIREMENTS.md` and `ISSUES.md` respectively.",
-                "",
-            ]
+        # 3. Technical Debt (one pre-joined block)
+        summary_section.append(
+            "\n".join(
+                (
+                    "### Technical Debt (Latest)",
+                    "| Category | Progress / Count | Status |",
+                    "| :--- | :--- | :--- |",
+                    f"| Requirements | {latest['total_reqs'] - latest['open_reqs']} / "
+                    f"{latest['total_reqs']} | {latest['open_reqs']} Pending |",
+                    f"| Issues | {latest['total_issues'] - latest['open_issues']} / "
+                    f"{latest['total_issues']} | {latest['open_issues']} Open |",
+                    f"| TODOs | {latest['todos']} | "
+                    f"{latest['todos']} code markers shown in graph |",
+                    f"| FIXMEs | {latest['fixmes']} | "
+                    f"{latest['fixmes']} code markers shown in graph |",
+                    "> [!NOTE]",
+                    "> Markdown markers (TODO/FIXME) excluded from debt chart. "
+                    "Requirements and Issues tracked via `REQUIREMENTS.md` and "
+                    "`ISSUES.md` respectively.",
+                    "",
+                )
+            )
         )
         charts.extend(summary_section)
         charts.append("")  # Spacer
@@ -1066,36 +1387,68 @@ def run_history_analysis(root_dir, args):
 
         charts.append("## Source Code Growth")
 
-        dates = [d["date"] for d in graph_data]
-        py_data = [d["loc_py"] for d in graph_data]
-        ts_data = [d["loc_ts"] for d in graph_data]
-        css_data = [d["loc_css"] for d in graph_data]
-        sh_data = [d["loc_sh"] for d in graph_data]
-        json_data = [d["loc_json"] for d in graph_data]
-        total_data = [d["loc_total"] for d in graph_data]
-
-        # Mermaid Fallback Definition
-        loc_def = "xychart-beta\n"
-        loc_def += '    title "Source Lines of Code over Time"\n'
-        loc_def += f"    x-axis {json.dumps(dates)}\n"
-        loc_def += '    y-axis "LOC"\n'
-        loc_def += f'    line {json.dumps(total_data)} "Total"\n'
-        loc_def += f'    line {json.dumps(py_data)} "Python"\n'
-        loc_def += f'    line {json.dumps(ts_data)} "TS/JS"\n'
-        loc_def += f'    line {json.dumps(css_data)} "CSS"\n'
-        loc_def += f'    line {json.dumps(sh_data)} "Shell"\n'
-        loc_def += f'    line {json.dumps(json_data)} "JSON"'
-
-        def make_loc_svg():
-            chart = SimpleSVGChart("Source Lines of Code over Time")
-            chart.set_x_labels(dates)
+        # Extract every chart series in a single pass over graph_data
+        get_series = itemgetter(
+            "date",
+            "loc_py",
+            "loc_ts",
+            "loc_css",
+            "loc_sh",
+            "loc_json",
+            "loc_total",
+            "test_loc_total",
+            "test_loc_py",
+            "test_loc_ts",
+            "test_loc_sh",
+            "todos",
+            "fixmes",
+        )
+        (
+            dates,
+            py_data,
+            ts_data,
+            css_data,
+            sh_data,
+            json_data,
+            total_data,
+            test_total_data,
+            test_py_data,
+            test_ts_data,
+            test_sh_data,
+            todo_data,
+            fixme_data,
+        ) = (list(column) for column in zip(*map(get_series, graph_data)))
+
+        # Mermaid Fallback Definition (x-axis shared by all three charts)
+        dates_json = dumps(dates)
+        loc_def = "\n".join(
+            [
+                "xychart-beta",
+                '    title "Source Lines of Code over Time"',
+                f"    x-axis {dates_json}",
+                '    y-axis "LOC"',
+                f'    line {dumps(total_data)} "Total"',
+                f'    line {dumps(py_data)} "Python"',
+                f'    line {dumps(ts_data)} "TS/JS"',
+                f'    line {dumps(css_data)} "CSS"',
+                f'    line {dumps(sh_data)} "Shell"',
+                f'    line {dumps(json_data)} "JSON"',
+            ]
+        )
+
+        # One chart object serves all three SVGs: they share the date axis
+        chart = SimpleSVGChart("")
+        chart.set_x_labels(dates)
+
+        def make_loc_svg(out):
+            chart.reset("Source Lines of Code over Time")
             chart.add_line(total_data, "Total", "#2196F3")  # Blue
             chart.add_line(py_data, "Python", "#4CAF50")  # Green
             chart.add_line(ts_data, "TS/JS", "#ff9800")  # Orange
             chart.add_line(css_data, "CSS", "#9c27b0")  # Purple
             chart.add_line(sh_data, "Shell", "#795548")  # Brown
             chart.add_line(json_data, "JSON", "#607d8b")  # Blue Grey
-            return chart.generate()
+            chart.generate(out)
 
         charts.append(
             generate_chart(
@@ -1106,28 +1459,26 @@ def run_history_analysis(root_dir, args):
         # Test Code Chart
         charts.append("\n## Test Code Growth")
 
-        test_total_data = [d["test_loc_total"] for d in graph_data]
-        test_py_data = [d["test_loc_py"] for d in graph_data]
-        test_ts_data = [d["test_loc_ts"] for d in graph_data]
-        test_sh_data = [d["test_loc_sh"] for d in graph_data]
-
-        test_def = "xychart-beta\n"
-        test_def += '    title "Test Lines of Code over Time"\n'
-        test_def += f"    x-axis {json.dumps(dates)}\n"
-        test_def += '    y-axis "LOC"\n'
-        test_def += f'    line {json.dumps(test_total_data)} "Total"\n'
-        test_def += f'    line {json.dumps(test_py_data)} "Python"\n'
-        test_def += f'    line {json.dumps(test_ts_data)} "TS/JS"\n'
-        test_def += f'    line {json.dumps(test_sh_data)} "Shell"'
-
-        def make_test_svg():
-            chart = SimpleSVGChart("Test Lines of Code over Time")
-            chart.set_x_labels(dates)
+        test_def = "\n".join(
+            [
+                "xychart-beta",
+                '    title "Test Lines of Code over Time"',
+                f"    x-axis {dates_json}",
+                '    y-axis "LOC"',
+                f'    line {dumps(test_total_data)} "Total"',
+                f'    line {dumps(test_py_data)} "Python"',
+                f'    line {dumps(test_ts_data)} "TS/JS"',
+                f'    line {dumps(test_sh_data)} "Shell"',
+            ]
+        )
+
+        def make_test_svg(out):
+            chart.reset("Test Lines of Code over Time")
             chart.add_line(test_total_data, "Total", "#2196F3")  # Blue
             chart.add_line(test_py_data, "Python", "#4CAF50")  # Green
             chart.add_line(test_ts_data, "TS/JS", "#ff9800")  # Orange
             chart.add_line(test_sh_data, "Shell", "#795548")  # Brown
-            return chart.generate()
+            chart.generate(out)
 
         charts.append(
             generate_chart(
@@ -1141,22 +1492,22 @@ def run_history_analysis(root_dir, args):
         # Debt Chart
         charts.append("\n## Technical Debt")
 
-        todo_data = [d["todos"] for d in graph_data]
-        fixme_data = [d["fixmes"] for d in graph_data]
-
-        debt_def = "xychart-beta\n"
-        debt_def += '    title "Technical Debt Markers"\n'
-        debt_def += f"    x-axis {json.dumps(dates)}\n"
-        debt_def += '    y-axis "Count"\n'
-        debt_def += f'    line {json.dumps(todo_data)} "TODOs"\n'
-        debt_def += f'    line {json.dumps(fixme_data)} "FIXMEs"'
+        debt_def = "\n".join(
+            [
+                "xychart-beta",
+                '    title "Technical Debt Markers"',
+                f"    x-axis {dates_json}",
+                '    y-axis "Count"',
+                f'    line {dumps(todo_data)} "TODOs"',
+                f'    line {dumps(fixme_data)} "FIXMEs"',
+            ]
+        )
 
-        def make_debt_svg():
-            chart = SimpleSVGChart("Technical Debt Markers")
-            chart.set_x_labels(dates)
+        def make_debt_svg(out):
+            chart.reset("Technical Debt Markers")
             chart.add_line(todo_data, "TODOs", "#e91e63")  # Pink
             chart.add_line(fixme_data, "FIXMEs", "#f44336")  # Red
-            return chart.generate()
+            chart.generate(out)
 
         charts.append(
             generate_chart(
@@ -1166,19 +1517,52 @@ def run_history_analysis(root_dir, args):
 
         charts.append("\n## Commit History")
 
-    # Insert charts before the table
-    # We find where the table starts (after the header info)
-    # Existing structure: Title, Date, Empty line, Table Header...
-
-    # We want to place charts after "Generated on ..."
-    insert_idx = 2
-    for line in reversed(charts):
-        final_output.insert(insert_idx, line)
-
-    report = "\n".join(final_output) + "\n"
+    # COMBINING
+    # Layout: title and timestamp, then charts/summaries, then the commit table.
+    # Sections are written in order, so no list insertion is needed.
+    # Heuristic: Find the separator line for the main table
+    sep_index = next(
+        (
+            i
+            for i, line in enumerate(existing_content)
+            if line.lstrip().startswith("|---")
+        ),
+        -1,
+    )
 
-    with open(output_path, "w") as f:
-        f.write(report)
+    if not existing_content or sep_index != -1:
+        # REBUILD the part BEFORE the table to have valid current summaries/charts,
+        # but keep any existing table rows after the new ones.
+        sections = [
+            [
+                "# Project History Analysis",
+                f"Generated on {datetime.now().isoformat()}",
+            ],
+            charts,
+            [
+                "",
+                "_LOC and marker counts exclude .js/.json files over 1 MiB "
+                "(bundles, generated data)._",
+                "",
+                "| Date | Commit | Author | Total | Py | TS/JS | MD | CSS | SH | "
+                "JSON | Tests | T-LOC | Py-T | TS-T | SH-T | TODO (C/M) | "
+                "FIXME (C/M) | Req | Iss |",
+                "|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|---|",
+            ],
+            new_rows,
+            # Only the kept tail is stripped, lazily, as it is written out
+            (line.strip() for line in existing_content[sep_index + 1 :]),
+        ]
+    else:
+        # Could not find table structure: keep the file, charts after its first
+        # two lines, and append the new rows.
+        old_lines = [line.strip() for line in existing_content]
+        sections = [old_lines[:2], charts, old_lines[2:], new_rows]
+
+    # Stream sections through one buffered handle; the report is never joined
+    with open(output_path, "w", buffering=1 << 16) as f:
+        for section in sections:
+            f.writelines(f"{line}\n" for line in section)
     print(f"Report written to {output_path}", file=sys.stderr)
 
 
@@ -1197,6 +1581,9 @@ def main():
     )
     parser.add_argument("--reverse", action="store_true", help="Oldest to Newest")
     parser.add_argument("--since", help="Analyze commits since this hash")
+    parser.add_argument(
+        "--no-merges", action="store_true", help="Skip merge commits in history"
+    )
     parser.add_argument(
         "--incremental",
         action="store_true",
@@ -1223,22 +1610,31 @@ def main():
 
     args = parser.parse_args()
 
-    # Determine Root
+    # Determine Root (one git call also resolves the superproject's agent_env
+    # entry; rev-parse still prints the root if that path is missing)
     cwd = Path.cwd()
     project_root = cwd
+    expected_hash = None
     try:
-        root_output = subprocess.check_output(
-            ["git", "rev-parse", "--show-toplevel"],
+        result = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel", "HEAD:agent_env"],
             cwd=cwd,
-            text=True,
+            stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
-        ).strip()
-        project_root = Path(root_output)
+            text=True,
+        )
+        root_lines = result.stdout.splitlines()
+        if root_lines:
+            project_root = Path(root_lines[0])
+            if result.returncode == 0 and len(root_lines) > 1:
+                expected_hash = root_lines[1]
+            else:
+                expected_hash = ""
     except Exception:
         pass  # Fallback to cwd
 
     check_configuration(project_root)
-    check_submodule_status(project_root)
+    check_submodule_status(project_root, expected_hash)
 
     if args.analyze_local:
         run_local_analysis(project_root, args)
@@ -1257,21 +1653,30 @@ def check_configuration(project_root):
         print("", file=sys.stderr)
 
 
-def check_submodule_status(project_root):
-    """Checks if the submodule is in sync with the superproject expectation."""
-    try:
-        # Get expected hash from superproject
-        # git ls-tree HEAD agent_env
-        # Output format: 160000 commit <hash>\tagent_env
-        cmd = ["git", "ls-tree", "HEAD", "agent_env"]
-        result = subprocess.run(cmd, cwd=project_root, capture_output=True, text=True)
-        if result.returncode != 0 or not result.stdout.strip():
-            return
+def check_submodule_status(project_root, expected_hash=None):
+    """Checks if the submodule is in sync with the superproject expectation.
 
-        parts = result.stdout.strip().split()
-        if len(parts) < 3:
+    expected_hash is the superproject's agent_env entry when the caller has
+    already resolved it ("" if absent); otherwise it is looked up here.
+    """
+    try:
+        if expected_hash is None:
+            # Get expected hash from superproject
+            # git ls-tree HEAD agent_env
+            # Output format: 160000 commit <hash>\tagent_env
+            cmd = ["git", "ls-tree", "HEAD", "agent_env"]
+            result = subprocess.run(
+                cmd, cwd=project_root, capture_output=True, text=True
+            )
+            if result.returncode != 0 or not result.stdout.strip():
+                return
+
+            parts = result.stdout.strip().split()
+            if len(parts) < 3:
+                return
+            expected_hash = parts[2]
+        if not expected_hash:
             return
-        expected_hash = parts[2]
 
         # Get actual hash
         submodule_path = project_root / "agent_env"
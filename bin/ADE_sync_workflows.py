@@ -10,24 +10,37 @@ REPO_ROOT = SCRIPT_DIR.parent.parent
 SOURCE_DIR = REPO_ROOT / ".agent" / "workflows"
 DEST_DIR = REPO_ROOT / "agent_env" / "workflows"
 
+# Non-empty description key inside the YAML frontmatter
+_DESCRIPTION_RE = re.compile(r'^description:\s*\S+', re.MULTILINE)
+
 def has_description(file_path):
     """Checks if the markdown file has a description in its YAML frontmatter."""
     try:
-        with open(file_path, "r") as f:
-            content = f.read()
-        
-        # Look for description: ... within the first --- block
-        frontmatter_match = re.search(r'^---\s*\n(.*?)\n---', content, re.DOTALL | re.MULTILINE)
-        if not frontmatter_match:
-            return False
-            
-        frontmatter = frontmatter_match.group(1)
+        # utf-8-sig drops a leading BOM so it cannot hide the opening marker
+        with open(file_path, "r", encoding="utf-8-sig") as f:
+            # Frontmatter must open the file: plain markdown is rejected on
+            # the first line, and only the frontmatter block is ever read
+            if f.readline().strip() != '---':
+                return False
+            frontmatter = []
+            for line in f:
+                if line.startswith('---'):
+                    break
+                frontmatter.append(line)
+            else:
+                return False
+
         # Check for description that isn't just whitespace
-        return bool(re.search(r'^description:\s*\S+', frontmatter, re.MULTILINE))
+        return bool(_DESCRIPTION_RE.search(''.join(frontmatter)))
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
         return False
 
+def scan_markdown(directory):
+    """Maps name -> os.DirEntry for the .md files directly in directory."""
+    with os.scandir(directory) as it:
+        return {e.name: e for e in it if e.name.endswith(".md") and e.is_file()}
+
 def sync_workflows():
     if not SOURCE_DIR.exists():
         print(f"ERROR: Source directory not found: {SOURCE_DIR}")
@@ -38,8 +51,9 @@ def sync_workflows():
         DEST_DIR.mkdir(parents=True)
 
     # Get all .md files from both directories
-    src_files = {f.name: f for f in SOURCE_DIR.glob("*.md")}
-    dest_files = {f.name: f for f in DEST_DIR.glob("*.md")}
+    # DirEntry objects cache their stat, so each file is stat'ed at most once
+    src_files = scan_markdown(SOURCE_DIR)
+    dest_files = scan_markdown(DEST_DIR)
     all_filenames = set(src_files.keys()) | set(dest_files.keys())
 
     synced_count = 0
@@ -51,8 +65,8 @@ def sync_workflows():
         src_path = SOURCE_DIR / filename
         dest_path = DEST_DIR / filename
         
-        src_exists = src_path.exists()
-        dest_exists = dest_path.exists()
+        src_exists = filename in src_files
+        dest_exists = filename in dest_files
 
         # CASE 1: Only in Source -> Sync to Dest
         if src_exists and not dest_exists:
@@ -73,8 +87,8 @@ def sync_workflows():
             continue
 
         # CASE 3: Both exist -> Compare timestamps
-        src_mtime = src_path.stat().st_mtime
-        dest_mtime = dest_path.stat().st_mtime
+        src_mtime = src_files[filename].stat().st_mtime
+        dest_mtime = dest_files[filename].stat().st_mtime
         
         # Allow 1 second difference for filesystem variations
         if src_mtime > dest_mtime + 1:
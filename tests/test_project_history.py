@@ -4,6 +4,8 @@
 
 
 
+import os
+import subprocess
 import sys
 from pathlib import Path
 from unittest.mock import MagicMock, mock_open, patch
@@ -39,19 +41,21 @@ def test_is_test_file():
 @patch("subprocess.run")
 def test_get_commits(mock_run):
     mock_run.return_value = MagicMock(
-        stdout="hash1|2024-01-01|Author 1|Subject 1\nhash2|2024-01-02|Author 2|Subject 2",
+        stdout=b"hash1\x002024-01-01\x00Author 1\x00Subject 1\x00"
+        b"hash2\x002024-01-02\x00Author 2\x00Subject | with pipe",
         returncode=0,
     )
 
     commits = history_script.get_commits(Path("."), limit=2)
     assert len(commits) == 2
     assert commits[0]["hash"] == "hash1"
+    assert commits[1]["subject"] == "Subject | with pipe"
 
 
 @patch("subprocess.run")
 def test_get_commits_since(mock_run):
     mock_run.return_value = MagicMock(
-        stdout="hashNew|2024-01-03|Author 3|Subject 3", returncode=0
+        stdout=b"hashNew\x002024-01-03\x00Author 3\x00Subject 3", returncode=0
     )
     history_script.get_commits(Path("."), since_commit="hash1")
     # Verify git call includes hash1..HEAD
@@ -59,13 +63,6 @@ def test_get_commits_since(mock_run):
     assert "hash1..HEAD" in args
 
 
-@patch("subprocess.run")
-def test_get_files_at_commit(mock_run):
-    mock_run.return_value = MagicMock(stdout="file1.py\nfile2.js", returncode=0)
-    files = history_script.get_files_at_commit(Path("."), "hash1")
-    assert len(files) == 2
-
-
 def test_parse_existing_history():
     content = """# Header
 | Date | Commit | ...
@@ -81,10 +78,9 @@ def test_parse_existing_history():
 
 @patch("subprocess.check_output")
 @patch("ADE_project_history.count_lines_file")
-@patch("os.walk")
-def test_run_local_analysis(mock_walk, mock_count, mock_git_ls):
-    # Mock git ls-files
-    mock_git_ls.return_value = "file1.py\nfile2.txt"
+def test_run_local_analysis(mock_count, mock_git_ls):
+    # Mock git ls-files -z
+    mock_git_ls.return_value = b"file1.py\0file2.txt\0"
     mock_count.return_value = (10, 1, 0)  # 10 LOC, 1 TODO
 
     # Mock args
@@ -110,3 +106,244 @@ def test_run_local_analysis(mock_walk, mock_count, mock_git_ls):
     # file1.py should be counted (1 file, 10 LOC)
     # file2.txt ignored (default config)
     assert "1" in output  # Files
+    mock_count.assert_called_once_with(os.path.join(".", "file1.py"))
+
+    # Extension and lockfile/vendor filtering is pushed into git pathspecs
+    cmd = mock_git_ls.call_args[0][0]
+    assert cmd[:3] == ["git", "ls-files", "-z"]
+    pathspecs = cmd[cmd.index("--") + 1 :]
+    assert ":(glob)**/*.py" in pathspecs
+    assert ":(exclude,glob)**/package-lock.json" in pathspecs
+    assert ":(exclude,glob)**/node_modules/**" in pathspecs
+
+
+def test_iter_files(tmp_path):
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "top.py").write_text("a = 1\n")
+    (tmp_path / "src" / "mod.py").write_text("b = 2\n")
+    (tmp_path / "src" / "pkg" / "deep.md").write_text("# Doc\n")
+    (tmp_path / ".git" / "objects").mkdir(parents=True)
+    (tmp_path / ".git" / "objects" / "blob.py").write_text("c = 3\n")
+    # A directory symlink is neither followed nor reported as a file
+    (tmp_path / "src_link").symlink_to(tmp_path / "src", target_is_directory=True)
+
+    found = sorted(
+        str(Path(p).relative_to(tmp_path)) for p in history_script._iter_files(tmp_path)
+    )
+    assert found == sorted(
+        ["top.py", str(Path("src") / "mod.py"), str(Path("src") / "pkg" / "deep.md")]
+    )
+
+
+def test_split_path():
+    assert history_script.split_path("src/app.py") == ("app.py", ".py")
+    assert history_script.split_path("archive.tar.gz") == ("archive.tar.gz", ".gz")
+    assert history_script.split_path("docs/.hidden") == (".hidden", "")
+    assert history_script.split_path("Makefile") == ("Makefile", "")
+
+
+@patch("ADE_project_history.get_commits")
+@patch("ADE_project_history.run_git_command")
+def test_incremental_up_to_date_skips_log(mock_git, mock_commits, tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "HISTORY.md").write_text(
+        "| Date | Commit |\n|---|---|\n| 2024-01-02 | `abc1234` | Dev |\n"
+    )
+    mock_git.return_value = "abc1234deadbeef"
+
+    args = MagicMock(since=None, incremental=True, limit=None, reverse=False)
+    history_script.run_history_analysis(tmp_path, args)
+
+    mock_git.assert_called_once_with(["rev-parse", "HEAD"], tmp_path)
+    mock_commits.assert_not_called()
+
+
+def test_parse_data_row():
+    row = (
+        "| 2024-01-02 | `abc1234` | Dev | 20 | 4 | 2 | 6 | 2 | 2 | 3 | 2 | 3 | 2 | 1 | 0 "
+        "| 2 / 1 | 3 / 0 | 1 / 2 | 1 / 2 |"
+    )
+    data = history_script.parse_data_row(row)
+    assert data["date"] == "2024-01-02"
+    assert data["loc_total"] == 20
+    assert data["md_todos"] == 1
+    assert data["total_issues"] == 2
+
+    assert history_script.parse_data_row("| Date | Commit | Author |") is None
+    assert history_script.parse_data_row("|---|---|---|") is None
+    assert history_script.parse_data_row("## Summary") is None
+
+
+def test_git_cat_file(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    (tmp_path / "a.py").write_text("x = 1\n# TODO\n")
+    (tmp_path / "empty.md").write_text("")
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "sub" / "mod.py").write_text("y = 2\n")
+    git("add", "-A")
+    git("-c", "user.name=T", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+
+    with history_script.GitCatFile(tmp_path) as batch:
+        assert batch.get_blob("HEAD:a.py") == "x = 1\n# TODO\n"
+        assert batch.get_blob("HEAD:missing.py") == ""
+        assert batch.get_blob("HEAD:empty.md") == ""
+        # The stream stays in sync after misses and empty blobs
+        assert batch.get_blob("HEAD:a.py").startswith("x = 1")
+
+        _, entries = batch.read_tree("HEAD^{tree}")
+        assert [(name, is_tree) for name, is_tree, _ in entries] == [
+            ("a.py", False),
+            ("empty.md", False),
+            ("pkg", True),
+        ]
+        assert batch.get_size(entries[0][2]) == len("x = 1\n# TODO\n")
+        assert batch.get_size("HEAD:missing.py") == 0
+
+        stats = history_script.analyze_commit(
+            batch, {"hash": "HEAD", "date": "d", "author": "a"}
+        )
+        # Files in nested trees are reached and counted
+        assert stats["loc_python"] == 3
+        assert stats["todos"] == 1
+
+
+def test_analyze_content_counts_marker_lines():
+    marker = "TO" + "DO"
+    content = f"a = 1  # {marker} {marker}\n\n   \n\t\n# {marker}\nb = 2"
+    assert history_script.analyze_content(content) == (3, 2, 0)
+
+
+def test_analyze_bytes_uses_byte_line_rules():
+    # Only \r and \n end lines and only ASCII whitespace is blank: form feeds,
+    # U+2028 and NBSP lines count differently than with str.splitlines
+    text = "a\x0cb\x1cc\u2028d\n\u00a0\n\x0b\n"
+    data = text.encode()
+    assert history_script.analyze_bytes(data) == (2, 0, 0)
+    assert history_script.analyze_mapped(data) == (2, 0, 0)
+    assert history_script.analyze_content(text) == (4, 0, 0)
+
+
+def test_count_lines_file_matches_analyze_content(tmp_path):
+    marker = "FIX" + "ME"
+    content = f"x = 1\r\n\r\n  \n# {marker}: é\ny = 2  # {marker}\n"
+    path = tmp_path / "mod.py"
+    path.write_text(content, encoding="utf-8", newline="")
+    expected = history_script.analyze_content(content)
+    assert expected == (3, 0, 2)
+    assert history_script.count_lines_file(path) == expected
+
+
+def test_size_cap_applies_to_bundles_in_both_modes(tmp_path):
+    big = b"x = 1\n" * ((1 << 20) // 6 + 1)
+    (tmp_path / "bundle.json").write_bytes(big)
+    (tmp_path / "big.py").write_bytes(big)
+    lines = big.count(b"\n")
+    assert history_script.count_lines_file(str(tmp_path / "bundle.json")) == (0, 0, 0)
+    assert history_script.count_lines_file(str(tmp_path / "big.py")) == (lines, 0, 0)
+
+    class Batch:
+        def __init__(self):
+            self.sized = []
+
+        def get_size(self, oid):
+            self.sized.append(oid)
+            return len(big)
+
+        def get_blob_bytes(self, oid):
+            return big
+
+    batch, agg = Batch(), {}
+    history_script._add_file_stats(batch, "big.py", "oid-py", agg)
+    history_script._add_file_stats(batch, "dist/bundle.json", "oid-json", agg)
+    # Only the likely bundle pays for a size query, and it is not counted
+    assert batch.sized == ["oid-json"]
+    assert agg["loc_total"] == lines
+    assert agg["loc_json"] == 0
+
+
+def test_parse_requirements_and_issues_content():
+    reqs = (
+        "| ID | Title | Status |\n"
+        "| **REQ-1** | Login | Planned |\n"
+        "| **REQ-2** | Logout | Done |\r\n"
+        "| **REQ-3** |\n"
+        "See **REQ-4** in prose\n"
+    )
+    assert history_script.parse_requirements_content(reqs) == (1, 3)
+
+    issues = (
+        "| **CR-1** | Crash | Open |\n"
+        "| **TECH-2** | Cleanup | ✅ Fixed |\n"
+        "| **LP-3** | Typo | open | p3 | resolved |\n"
+    )
+    assert history_script.parse_issues_content(issues) == (1, 3)
+
+
+def test_analyze_commit_sums_subtrees(tmp_path):
+    def git(*args):
+        return subprocess.run(
+            ["git", "-c", "user.name=T", "-c", "user.email=t@t", *args],
+            cwd=tmp_path,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    git("init", "-q")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "mod.py").write_text("a = 1\nb = 2\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_mod.py").write_text("def test():\n    pass\n")
+    (tmp_path / "package-lock.json").write_text("{}\n")
+    git("add", "-A")
+    git("commit", "-q", "-m", "one")
+    (tmp_path / "run.sh").write_text("echo hi\n")
+    git("add", "-A")
+    git("commit", "-q", "-m", "two")
+
+    with history_script.GitCatFile(tmp_path) as batch:
+        stats = [
+            history_script.analyze_commit(
+                batch, {"hash": git("rev-parse", rev), "date": "d", "author": "a"}
+            )
+            for rev in ("HEAD~1", "HEAD")
+        ]
+    assert stats[0]["loc_python"] == 2
+    assert stats[0]["test_loc_python"] == 2
+    assert stats[0]["loc_json"] == 0  # lock file
+    assert stats[0]["loc_total"] == 3
+    assert stats[1]["loc_shell"] == 1
+    assert stats[1]["loc_total"] == 4
+    assert stats[1]["test_files"] == 1
+    # The untouched pkg/ subtree is summed once and reused by the second commit
+    pkg_oid = git("rev-parse", "HEAD:pkg")
+    assert history_script._TREE_STATS["pkg/", pkg_oid] == {
+        "todos": 0,
+        "fixmes": 0,
+        "loc_total": 2,
+        "loc_python": 2,
+    }
+
+
+def test_analyze_mapped_matches_analyze_bytes():
+    marker = ("TO" + "DO").encode()
+    data = b"a = 1\r\n\r\n \t\n# " + marker + b" " + marker + b"\rb\x0c\n\n" + marker
+    assert history_script.analyze_mapped(data) == history_script.analyze_bytes(data)
+    assert history_script.analyze_mapped(data) == (4, 2, 0)
+
+
+def test_analyze_mapped_long_line_and_repeated_markers():
+    todo, fixme = ("TO" + "DO").encode(), ("FIX" + "ME").encode()
+    # Two markers on one line count once
+    same_line = b"x " + todo + b" y " + todo + b"\n" + fixme + b" " + fixme
+    assert history_script.analyze_mapped(same_line) == (2, 1, 1)
+    # A minified-style single line must scan in linear time
+    long_line = b"a" * 1_000_000 + todo + b" " + todo + b" " + fixme
+    assert history_script.analyze_mapped(long_line) == (1, 1, 1)
+    assert history_script.analyze_mapped(long_line) == history_script.analyze_bytes(
+        long_line
+    )